@@ -1,7 +1,10 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 from datetime import datetime
+from pathlib import Path
 import os
+import tempfile
 
 # Page config
 st.set_page_config(page_title="Zero Theta Dashboard", layout="wide")
@@ -74,60 +77,163 @@ st.markdown("""
     </style>
 """, unsafe_allow_html=True)
 
+# Data files, resolved once per script run
+CSV_PATH = Path(__file__).parent / "data" / "trading_results.csv"
+PARQUET_PATH = CSV_PATH.with_suffix(".parquet")
+
+# Column types of trading_results.csv, so pandas can skip type inference.
+# Repetitive string columns are stored as categoricals.
+CSV_DTYPES = {
+    'trade_type': 'category',
+    'symbol': 'category',
+    'strikes': 'string',
+    'entry_action': 'category',
+    'exit_action': 'category',
+    'status': 'category',
+    'strategy': 'category',
+    'entry_price': 'float64',
+    'exit_price': 'float64',
+    'profit': 'float64',
+}
+
+def pair_profits(group_id, action, is_bot, is_sld, price):
+    """Pair the i-th BOT with the i-th SLD of each trade group, on arrays sorted
+    by group, action and time. Returns the pair profit for every row (0 if unpaired)."""
+    n = len(group_id)
+    profit = np.zeros(n)
+    if n == 0:
+        return profit
+
+    # Rows whose group keys contain NaN get no group (NaN id) and stay unpaired
+    valid = ~np.isnan(group_id)
+
+    # Chronological index of each row within its (group, action) run
+    positions = np.arange(n)
+    run_start = np.r_[True, (group_id[1:] != group_id[:-1]) | (action[1:] != action[:-1])]
+    pair_idx = positions - np.maximum.accumulate(np.where(run_start, positions, 0))
+
+    # Join BOT and SLD rows on (group, pair index) encoded as one integer key
+    key = np.where(valid, group_id, 0).astype(np.int64) * n + pair_idx
+    bot_pos = np.flatnonzero(valid & is_bot)
+    sld_pos = np.flatnonzero(valid & is_sld)
+    _, bot_match, sld_match = np.intersect1d(key[bot_pos], key[sld_pos], assume_unique=True, return_indices=True)
+    bot_pos = bot_pos[bot_match]
+    sld_pos = sld_pos[sld_match]
+
+    # Calculate profit: (BOT - SLD) × 100, applied to both rows in the pair
+    pair_profit = (price[bot_pos] - price[sld_pos]) * 100
+    profit[bot_pos] = pair_profit
+    profit[sld_pos] = pair_profit
+    return profit
+
 # Load data
 @st.cache_data
 def load_data():
-    csv_path = os.path.join(os.path.dirname(__file__), "data", "trading_results.csv")
-    df = pd.read_csv(csv_path)
-    df['date'] = pd.to_datetime(df['date'], errors='coerce')
-    df['entry_time'] = pd.to_datetime(df['entry_time'], errors='coerce')
+    """Returns the trades and the source mtime they were built from, which
+    identifies this version of the data."""
+    # Reuse the parquet sidecar from a previous load if it was built from the
+    # current CSV and this script (which defines the processing below). The
+    # sidecar's mtime is stamped with that source mtime when it is written.
+    # Taken before reading the CSV, so rows appended meanwhile change the mtime
+    # and invalidate the sidecar on the next load
+    source_mtime = max(CSV_PATH.stat().st_mtime_ns, Path(__file__).stat().st_mtime_ns)
+    try:
+        if PARQUET_PATH.stat().st_mtime_ns == source_mtime:
+            df = pd.read_parquet(PARQUET_PATH)
+            # All-empty categoricals (e.g. exit_action) come back as object
+            return df.astype({col: dtype for col, dtype in CSV_DTYPES.items() if col in df.columns}), source_mtime
+    except Exception:
+        # Missing or unreadable sidecar, rebuild it from the CSV
+        pass
+
+    # The pyarrow engine rejects rows with fewer fields than the header, which the
+    # C parser pads with NaN; fall back to it so a short appended row still loads
+    try:
+        df = pd.read_csv(CSV_PATH, dtype=CSV_DTYPES, engine='pyarrow')
+    except pd.errors.ParserError:
+        df = pd.read_csv(CSV_PATH, dtype=CSV_DTYPES)
+    df['date'] = pd.to_datetime(df['date'], format='%Y-%m-%d', errors='coerce')
+    # The pyarrow engine parses well-formed timestamps itself, at second resolution,
+    # so the format only applies to the C parser or a column pyarrow left as text.
+    # Keep nanosecond datetimes so the parquet sidecar round-trips the same dtype
+    df['entry_time'] = pd.to_datetime(df['entry_time'], format='%Y-%m-%d %H:%M:%S', errors='coerce').astype('datetime64[ns]')
 
     # Handle exit_time if it exists (backwards compatibility)
     if 'exit_time' in df.columns:
-        df['exit_time'] = pd.to_datetime(df['exit_time'], errors='coerce')
+        df['exit_time'] = pd.to_datetime(df['exit_time'], format='%Y-%m-%d %H:%M:%S', errors='coerce').astype('datetime64[ns]')
 
     # Add strategy column if it doesn't exist (for backwards compatibility)
     if 'strategy' not in df.columns:
-        df['strategy'] = 'Unknown'
+        df['strategy'] = pd.Series('Unknown', index=df.index, dtype='category')
 
     # Drop rows with invalid dates
     df = df.dropna(subset=['date'])
 
     # Calculate profits by pairing BOT and SLD actions
-    # Initialize profit column
-    df['profit'] = 0.0
-
-    # Group by trade identifiers to find BOT/SLD pairs
-    trade_groups = df.groupby(['date', 'trade_type', 'symbol', 'strikes'])
-
-    for group_key, group in trade_groups:
-        # Sort by entry_time to pair trades chronologically
-        group = group.sort_values('entry_time')
-
-        # Find BOT and SLD rows in this group
-        bot_rows = group[group['entry_action'] == 'BOT']
-        sld_rows = group[group['entry_action'] == 'SLD']
-
-        # Pair BOT and SLD rows in chronological order
-        num_pairs = min(len(bot_rows), len(sld_rows))
-
-        for i in range(num_pairs):
-            bot_idx = bot_rows.iloc[i].name
-            sld_idx = sld_rows.iloc[i].name
-
-            bot_price = bot_rows.iloc[i]['entry_price']
-            sld_price = sld_rows.iloc[i]['entry_price']
-
-            # Calculate profit: (BOT - SLD) × 100
-            profit = (bot_price - sld_price) * 100
-
-            # Apply profit to both rows in the pair
-            df.loc[bot_idx, 'profit'] = profit
-            df.loc[sld_idx, 'profit'] = profit
-
-    return df
+    # Sort once so every trade group is contiguous and chronological per action
+    trade_keys = ['date', 'trade_type', 'symbol', 'strikes']
+    df = df.sort_values(trade_keys + ['entry_action', 'entry_time'], kind='stable')
+    df['profit'] = pair_profits(
+        df.groupby(trade_keys, observed=True, sort=False).ngroup().to_numpy(),
+        df['entry_action'].cat.codes.to_numpy(),
+        (df['entry_action'] == 'BOT').to_numpy(),
+        (df['entry_action'] == 'SLD').to_numpy(),
+        df['entry_price'].to_numpy()
+    )
+
+    # The sidebar lists the categories as filter options: label blank cells
+    # 'Unknown' so those rows stay selectable (after pairing, which skips them),
+    # and drop categories only used by the removed rows
+    for col in ['trade_type', 'strategy']:
+        if df[col].isna().any():
+            if 'Unknown' not in df[col].cat.categories:
+                df[col] = df[col].cat.add_categories('Unknown')
+            df[col] = df[col].fillna('Unknown')
+        df[col] = df[col].cat.remove_unused_categories()
+
+    # Write the parquet sidecar for the next cold start (best effort, e.g. read-only deploys).
+    # Write a temp file first and swap it in, so a killed process or concurrent
+    # sessions never leave a truncated sidecar behind
+    try:
+        fd, tmp_name = tempfile.mkstemp(dir=PARQUET_PATH.parent, prefix=PARQUET_PATH.stem + '.', suffix='.parquet')
+        os.close(fd)
+        try:
+            df.to_parquet(tmp_name, index=False)
+            os.utime(tmp_name, ns=(source_mtime, source_mtime))
+            os.replace(tmp_name, PARQUET_PATH)
+        finally:
+            Path(tmp_name).unlink(missing_ok=True)
+    except Exception:
+        # Unwritable data dir or a pyarrow conversion error: serve the CSV result uncached
+        pass
+
+    return df, source_mtime
+
+def compute_aggregates(filtered_df):
+    # For profit calculations, use only BOT rows to avoid double-counting
+    # (each trade pair has identical profit on both BOT and SLD rows)
+    bot_rows = filtered_df[filtered_df['entry_action'] == 'BOT']
+
+    daily_summary = bot_rows.groupby('date').agg({
+        'profit': ['sum', 'mean', 'count']
+    }).round(2)
+    daily_summary.columns = ['Total Profit', 'Avg Profit', 'Trades']
+    daily_summary.index = pd.Index(daily_summary.index.date, name='date')
+    daily_summary = daily_summary.sort_index(ascending=False)
+
+    return {
+        'days_traded': filtered_df['date'].nunique(),
+        # Count BOT rows only (one per trade pair)
+        'total_trades': len(bot_rows),
+        'avg_profit': bot_rows['profit'].mean(),
+        'total_profit': bot_rows['profit'].sum(),
+        'win_rate': (bot_rows['profit'] > 0).sum() / len(bot_rows) * 100 if len(bot_rows) > 0 else None,
+        'daily_summary': daily_summary,
+        'daily_profit': bot_rows.groupby('date')['profit'].sum(),
+        'strategy_profit': bot_rows.groupby('strategy', observed=True)['profit'].sum(),
+    }
 
-df = load_data()
+df, data_version = load_data()
 
 # Title
 st.title("Zero Theta Dashboard")
@@ -147,52 +253,58 @@ date_range = st.sidebar.date_input(
 
 trade_type_filter = st.sidebar.multiselect(
     "Trade Type",
-    options=df['trade_type'].unique(),
-    default=df['trade_type'].unique()
+    options=list(df['trade_type'].cat.categories),
+    default=list(df['trade_type'].cat.categories)
 )
 
 strategy_filter = st.sidebar.multiselect(
     "Strategy",
-    options=df['strategy'].unique(),
-    default=df['strategy'].unique()
+    options=list(df['strategy'].cat.categories),
+    default=list(df['strategy'].cat.categories)
 )
 
 # Apply filters
-filtered_df = df[
-    (df['date'].dt.date >= date_range[0]) &
-    (df['date'].dt.date <= date_range[1]) &
-    (df['trade_type'].isin(trade_type_filter)) &
-    (df['strategy'].isin(strategy_filter))
-]
+# 'date' holds midnight timestamps, so compare and group on it directly
+# instead of materializing Python date objects via .dt.date.
+# Combine the filters as plain boolean arrays and index the frame once
+dates = df['date'].to_numpy()
+mask = (
+    (dates >= np.datetime64(date_range[0])) &
+    (dates <= np.datetime64(date_range[1])) &
+    df['trade_type'].isin(trade_type_filter).to_numpy() &
+    df['strategy'].isin(strategy_filter).to_numpy()
+)
+filtered_df = df[mask]
+
+# Aggregates only depend on the loaded data and the filters, so reuse them
+# across reruns triggered by anything else (e.g. chart interactions)
+# Filter values are stringified for sorting: a blank cell shows up as a NaN option
+aggregates_key = (data_version, tuple(date_range), tuple(sorted(map(str, trade_type_filter))), tuple(sorted(map(str, strategy_filter))))
+cached = st.session_state.get('aggregates')
+if cached is None or cached[0] != aggregates_key:
+    cached = (aggregates_key, compute_aggregates(filtered_df))
+    st.session_state['aggregates'] = cached
+aggregates = cached[1]
 
 # Key Metrics
 st.header("Performance Overview")
 col1, col2, col3, col4, col5 = st.columns(5)
 
-# For profit calculations, use only BOT rows to avoid double-counting
-# (each trade pair has identical profit on both BOT and SLD rows)
-bot_rows = filtered_df[filtered_df['entry_action'] == 'BOT']
-
 with col1:
-    days_traded = filtered_df['date'].dt.date.nunique()
-    st.metric("Days Traded", days_traded)
+    st.metric("Days Traded", aggregates['days_traded'])
 
 with col2:
-    # Count BOT rows only (one per trade pair)
-    st.metric("Total Trades", len(bot_rows))
+    st.metric("Total Trades", aggregates['total_trades'])
 
 with col3:
-    avg_profit = bot_rows['profit'].mean()
-    st.metric("Avg Profit", f"${avg_profit:.2f}")
+    st.metric("Avg Profit", f"${aggregates['avg_profit']:.2f}")
 
 with col4:
-    total_profit = bot_rows['profit'].sum()
-    st.metric("Total Profit", f"${total_profit:.2f}")
+    st.metric("Total Profit", f"${aggregates['total_profit']:.2f}")
 
 with col5:
-    if len(bot_rows) > 0:
-        win_rate = (bot_rows['profit'] > 0).sum() / len(bot_rows) * 100
-        st.metric("Win Rate", f"{win_rate:.1f}%")
+    if aggregates['win_rate'] is not None:
+        st.metric("Win Rate", f"{aggregates['win_rate']:.1f}%")
     else:
         st.metric("Win Rate", "N/A")
 
@@ -201,13 +313,7 @@ st.divider()
 
 # Daily Summary
 st.header("Daily Performance")
-# Use only BOT rows to avoid double-counting profits
-daily_summary = bot_rows.groupby(bot_rows['date'].dt.date).agg({
-    'profit': ['sum', 'mean', 'count']
-}).round(2)
-daily_summary.columns = ['Total Profit', 'Avg Profit', 'Trades']
-daily_summary = daily_summary.sort_index(ascending=False)
-st.dataframe(daily_summary, use_container_width=True, height=300)
+st.dataframe(aggregates['daily_summary'], use_container_width=True, height=300)
 
 # Separator
 st.divider()
@@ -218,30 +324,30 @@ col1, col2 = st.columns(2)
 
 with col1:
     st.subheader("Profit by Date")
-    # Use only BOT rows to avoid double-counting profits
-    daily_profit = bot_rows.groupby(bot_rows['date'].dt.date)['profit'].sum()
-    st.line_chart(daily_profit)
+    st.line_chart(aggregates['daily_profit'])
 
 with col2:
     st.subheader("Profit by Strategy")
-    # Use only BOT rows to avoid double-counting profits
-    strategy_profit = bot_rows.groupby('strategy')['profit'].sum()
-    st.bar_chart(strategy_profit)
+    st.bar_chart(aggregates['strategy_profit'])
 
 # Separator
 st.divider()
 
 # Detailed Trade Log
 st.header("Trade Log")
-display_df = filtered_df.copy()
-display_df['date'] = display_df['date'].dt.strftime('%Y-%m-%d')
-display_df['entry_time'] = display_df['entry_time'].dt.strftime('%Y-%m-%d %H:%M:%S')
-if 'exit_time' in display_df.columns:
-    display_df['exit_time'] = display_df['exit_time'].dt.strftime('%Y-%m-%d %H:%M:%S')
-display_df['profit'] = display_df['profit'].apply(lambda x: f"${x:.2f}")
+# Let Streamlit format dates and profits client-side instead of
+# converting every row to a string in Python
+column_config = {
+    'date': st.column_config.DateColumn(format='YYYY-MM-DD'),
+    'entry_time': st.column_config.DatetimeColumn(format='YYYY-MM-DD HH:mm:ss'),
+    'profit': st.column_config.NumberColumn(format='$%.2f'),
+}
+if 'exit_time' in filtered_df.columns:
+    column_config['exit_time'] = st.column_config.DatetimeColumn(format='YYYY-MM-DD HH:mm:ss')
 
 st.dataframe(
-    display_df.sort_values('entry_time', ascending=False),
+    filtered_df.sort_values('entry_time', ascending=False),
     use_container_width=True,
-    hide_index=True
+    hide_index=True,
+    column_config=column_config
 )